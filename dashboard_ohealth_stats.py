@@ -1,6 +1,10 @@
+import hashlib
+import json
+from pathlib import Path
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+
+import report_figures as rf
 
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config(
@@ -95,6 +99,62 @@ age_median = 35.00
 
 total_rows = 504  # from your run "Processing row 1 / 504"
 
+# ---------------- SNAPSHOT (OVERRIDES THE STATS ABOVE) ----------------
+# When stats_hospital.py has written a snapshot, every chart, KPI and the data-quality
+# profile come from that one run, so they always agree; the stats above are the fallback.
+SNAPSHOT_JSON = "snapshots/Balrampur_jan16_feb2.json"
+
+# Every viewer session re-runs this script. The snapshot, frames and figures are
+# built once per snapshot version and shared process-wide (st.cache_resource)
+# instead of per session. Treat the returned objects as read-only.
+CACHE_TTL_SECONDS = 6 * 60 * 60
+CACHE_MAX_SNAPSHOTS = 4
+CACHE_MAX_FIGURES = 256
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_SNAPSHOTS, show_spinner=False)
+def load_snapshot(path, mtime):
+    """(problem, snapshot); keyed by mtime so a rewritten snapshot reloads. `problem` is None on success."""
+    if mtime is None:
+        return f"No snapshot found. Run `stats_hospital.py` to write `{path}`.", None
+    try:
+        with open(path, encoding="utf-8") as f:
+            snap = json.load(f)
+    except (OSError, ValueError) as e:
+        return f"Could not read `{path}` ({e}). Re-run `stats_hospital.py`.", None
+    if not isinstance(snap, dict) or "symptoms_freq" not in snap:
+        return f"`{path}` is not a stats snapshot. Re-run `stats_hospital.py`.", None
+    return None, snap
+
+snapshot_path = Path(SNAPSHOT_JSON)
+snapshot_problem, snapshot = load_snapshot(
+    SNAPSHOT_JSON, snapshot_path.stat().st_mtime if snapshot_path.exists() else None
+)
+
+data_quality = None
+if snapshot:
+    symptoms_freq = snapshot.get("symptoms_freq", {})
+    total_unique_symptoms = snapshot.get("total_unique_symptoms", len(symptoms_freq))
+    symptom_duration_map = snapshot.get("symptom_duration_map", {})
+    specialists_freq = snapshot.get("specialists_freq", {})
+    age_buckets = snapshot.get("age_buckets", {})
+    gender_freq_raw = snapshot.get("gender_freq", {})
+    initial_symptoms_freq = snapshot.get("initial_symptoms_freq", {})
+    total_unique_initial_symptoms = snapshot.get("total_unique_initial_symptoms", len(initial_symptoms_freq))
+    age_count = snapshot.get("age_count", 0)
+    age_min = snapshot.get("age_min", "–")
+    age_max = snapshot.get("age_max", "–")
+    age_mean = snapshot.get("age_mean", "–")
+    age_median = snapshot.get("age_median", "–")
+    total_rows = snapshot.get("total_rows", 0)
+    data_quality = snapshot.get("data_quality")
+
+if snapshot_problem:
+    dq_problem = f"No measured data-quality profile. {snapshot_problem}"
+elif data_quality is None:
+    dq_problem = f"`{SNAPSHOT_JSON}` has no data-quality profile. Re-run `stats_hospital.py`."
+else:
+    dq_problem = None
+
 # ---------------- NORMALIZATIONS ----------------
 gender_freq = {}
 for k, v in gender_freq_raw.items():
@@ -104,17 +164,63 @@ for k, v in gender_freq_raw.items():
     gender_freq[kk] = gender_freq.get(kk, 0) + int(v)
 
 # ---------------- UTILS ----------------
-def dict_to_df(d, col_key="label", col_val="count"):
-    df = pd.DataFrame(list(d.items()), columns=[col_key, col_val])
-    df = df.sort_values(col_val, ascending=False)
-    return df
-
 def top_item(d):
     if not d:
         return ("", 0)
     k = max(d, key=d.get)
     return (k, d[k])
 
+# ---------------- SHARED AGGREGATE CACHE ----------------
+def snapshot_version():
+    """Content hash of the stats in use; changes whenever a new snapshot lands or is pasted in."""
+    payload = json.dumps(
+        [symptoms_freq, symptom_duration_map, specialists_freq, age_buckets,
+         gender_freq, initial_symptoms_freq, total_rows, data_quality],
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+SNAPSHOT_VERSION = snapshot_version()
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_SNAPSHOTS, show_spinner=False)
+def load_frames(version):
+    """Sorted frames for one snapshot version (keyed by version so a new snapshot invalidates)."""
+    return rf.build_frames({
+        "symptoms_freq": symptoms_freq,
+        "initial_symptoms_freq": initial_symptoms_freq,
+        "specialists_freq": specialists_freq,
+        "age_buckets": age_buckets,
+        "gender_freq": gender_freq,
+        "symptom_duration_map": symptom_duration_map,
+    })
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_SNAPSHOTS, show_spinner=False)
+def data_quality_view(version):
+    """(long issue frame, figure or None) for the snapshot's data-quality profile."""
+    df = rf.data_quality_frame(data_quality)
+    return df, (rf.data_quality_figure(df) if not df.empty else None)
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_FIGURES, show_spinner=False)
+def symptom_figure(version, view_mode, top_n):
+    frames = load_frames(version)
+    key = "symptoms" if view_mode == "All Symptoms" else "initial_symptoms"
+    return rf.symptom_figure(frames[key].head(top_n))
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_SNAPSHOTS, show_spinner=False)
+def specialist_figures(version):
+    return rf.specialist_figures(load_frames(version)["specialists"])
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_SNAPSHOTS, show_spinner=False)
+def demographic_figures(version):
+    frames = load_frames(version)
+    return rf.demographic_figures(frames["age"], frames["gender"])
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_FIGURES, show_spinner=False)
+def duration_figure(version, symptom):
+    return rf.duration_figure(load_frames(version)["durations"][symptom])
+
+df_dq, fig_dq = data_quality_view(SNAPSHOT_VERSION)
+
 # ---------------- HEADER ----------------
 st.markdown(
     """
@@ -128,6 +234,11 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+if snapshot:
+    st.caption(f"Stats from `{SNAPSHOT_JSON}` ({snapshot.get('hospital', '')} {snapshot.get('window', '')})")
+else:
+    st.caption(f"Stats from the built-in snippet. {snapshot_problem}")
+
 st.write("")
 
 # ---------------- KPI ROW ----------------
@@ -166,13 +277,16 @@ with c3:
     )
 
 # Choose dataset
+frames = load_frames(SNAPSHOT_VERSION)
 if view_mode == "All Symptoms":
-    df_sym = dict_to_df(symptoms_freq, "symptom", "count").head(top_n)
+    df_sym = frames["symptoms"].head(top_n)
 else:
-    df_sym = dict_to_df(initial_symptoms_freq, "symptom", "count").head(top_n)
+    df_sym = frames["initial_symptoms"].head(top_n)
 
 # ---------------- MAIN TABS ----------------
-tab1, tab2, tab3, tab4 = st.tabs(["📌 Symptoms", "🧭 Specialist Load", "👥 Demographics", "⏳ Duration Explorer"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(
+    ["📌 Symptoms", "🧭 Specialist Load", "👥 Demographics", "⏳ Duration Explorer", "🧪 Data Quality"]
+)
 
 # ---- TAB 1: Symptoms ----
 with tab1:
@@ -180,14 +294,7 @@ with tab1:
 
     with left:
         st.subheader("Symptom Frequency")
-        fig = px.bar(
-            df_sym.sort_values("count", ascending=True),
-            x="count",
-            y="symptom",
-            orientation="h",
-            text="count",
-        )
-        fig.update_layout(height=520, margin=dict(l=10, r=10, t=30, b=10))
+        fig = symptom_figure(SNAPSHOT_VERSION, view_mode, top_n)
         st.plotly_chart(fig, use_container_width=True)
 
     with right:
@@ -196,38 +303,25 @@ with tab1:
 
 # ---- TAB 2: Specialists ----
 with tab2:
-    df_spec = dict_to_df(specialists_freq, "specialist", "count")
+    fig_spec, fig_pie = specialist_figures(SNAPSHOT_VERSION)
     cA, cB = st.columns([1.35, 1])
 
     with cA:
         st.subheader("Specialist Frequency (Leaderboard)")
-        fig = px.bar(
-            df_spec.head(25).sort_values("count", ascending=True),
-            x="count",
-            y="specialist",
-            orientation="h",
-            text="count"
-        )
-        fig.update_layout(height=560, margin=dict(l=10, r=10, t=30, b=10))
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig_spec, use_container_width=True)
 
     with cB:
         st.subheader("Share of Total (Top 10)")
-        df_pie = df_spec.head(10)
-        fig = px.pie(df_pie, names="specialist", values="count", hole=0.45)
-        fig.update_layout(height=560, margin=dict(l=10, r=10, t=30, b=10))
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig_pie, use_container_width=True)
 
 # ---- TAB 3: Demographics ----
 with tab3:
+    fig_age, fig_gender = demographic_figures(SNAPSHOT_VERSION)
     d1, d2 = st.columns(2)
 
     with d1:
         st.subheader("Age Distribution (Buckets)")
-        df_age = dict_to_df(age_buckets, "age_range", "count")
-        fig = px.bar(df_age, x="age_range", y="count", text="count")
-        fig.update_layout(height=420, margin=dict(l=10, r=10, t=30, b=10))
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig_age, use_container_width=True)
 
         st.subheader("Age Summary")
         st.write(
@@ -241,46 +335,66 @@ with tab3:
 
     with d2:
         st.subheader("Gender Distribution")
-        df_gender = dict_to_df(gender_freq, "gender", "count")
-        fig = px.bar(df_gender, x="gender", y="count", text="count")
-        fig.update_layout(height=420, margin=dict(l=10, r=10, t=30, b=10))
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig_gender, use_container_width=True)
 
         st.subheader("Data Quality Note")
-        st.warning(
-            "Gender has missing entries. Consider enforcing gender confirmation at intake.\n"
-            "Also normalize variants (e.g., `male` → `M`) at ingestion."
-        )
+        if data_quality:
+            gender_dq = data_quality.get("columns", {}).get("gender", {})
+            variants = ", ".join(f"`{g}` ({c})" for g, c in data_quality.get("gender_variants", {}).items())
+            st.warning(
+                f"Gender missing in **{gender_dq.get('null', 0)}** rows and non-canonical in "
+                f"**{gender_dq.get('non_canonical', 0)}** rows{': ' + variants if variants else ''}.\n"
+                "See the *Data Quality* tab for every column."
+            )
+        else:
+            st.warning(
+                "Gender has missing entries. Consider enforcing gender confirmation at intake.\n"
+                "Also normalize variants (e.g., `male` → `M`) at ingestion."
+            )
 
 # ---- TAB 4: Duration Explorer ----
 with tab4:
     st.subheader("Explore Symptom Durations")
-    st.caption("This is from the available per-symptom duration dicts in your stats snippet.")
+    st.caption("This is from the available per-symptom duration dicts in the loaded stats.")
 
     available_symptoms = sorted(symptom_duration_map.keys())
     picked = st.selectbox("Select symptom", available_symptoms, index=0)
 
-    dur_dict = symptom_duration_map.get(picked, {})
-    if not dur_dict:
+    df_dur = frames["durations"].get(picked)
+    if df_dur is None:
         st.info("No duration data available for this symptom.")
     else:
-        df_dur = dict_to_df(dur_dict, "duration", "count")
         cL, cR = st.columns([1.35, 1])
 
         with cL:
-            fig = px.bar(
-                df_dur.sort_values("count", ascending=True),
-                x="count",
-                y="duration",
-                orientation="h",
-                text="count"
-            )
-            fig.update_layout(height=480, margin=dict(l=10, r=10, t=30, b=10))
+            fig = duration_figure(SNAPSHOT_VERSION, picked)
             st.plotly_chart(fig, use_container_width=True)
 
         with cR:
             st.subheader("Duration Table")
             st.dataframe(df_dur, use_container_width=True, height=480)
 
+# ---- TAB 5: Data Quality ----
+with tab5:
+    st.subheader("Data Quality (measured)")
+    if dq_problem:
+        st.info(dq_problem)
+    elif df_dq.empty:
+        st.success("No data-quality issues found in the latest snapshot.")
+    else:
+        st.caption("Counted in the same pass as the stats: nulls, unparseable JSON, unparsed ages/durations, "
+                   "non-canonical genders and empty chief complaints, per column.")
+        qL, qR = st.columns([1.35, 1])
+
+        with qL:
+            st.plotly_chart(fig_dq, use_container_width=True)
+
+        with qR:
+            df_table = df_dq.pivot(index="column", columns="issue", values="count").fillna(0).astype(int)
+            st.dataframe(df_table, use_container_width=True, height=420)
+            variants = data_quality.get("gender_variants", {})
+            if variants:
+                st.write("Non-canonical gender values: " + ", ".join(f"`{g}` ({c})" for g, c in variants.items()))
+
 st.markdown("---")
 st.caption("Built for quick OPD/triage visibility • O-Health analytics view")
@@ -0,0 +1,158 @@
+import json
+import hashlib
+import html
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from plotly.offline import get_plotlyjs
+
+import report_figures as rf
+
+# ---------------- CONFIG ----------------
+# One aggregate snapshot per hospital + date window, written by stats_hospital.py
+SNAPSHOT_DIR = "snapshots"
+EXPORT_DIR = "report_bundles"
+
+TOP_N = 20          # same default as the dashboard's Top-N slider
+DURATION_TOP_N = 30 # duration charts for the top symptoms by volume (as stats_hospital prints);
+                    # the durations extract keeps every symptom
+WORKERS = None      # process pool size (None -> os.cpu_count())
+EXPORT_PNG = False  # needs the optional `kaleido` package; slow, so off by default
+
+# Bump when the bundle layout changes so every bundle is re-rendered once
+BUNDLE_VERSION = "5"
+
+# ---------------- HELPERS ----------------
+def snapshot_hash(raw_bytes):
+    return hashlib.sha1(BUNDLE_VERSION.encode("utf-8") + b"\0" + raw_bytes).hexdigest()
+
+def build_figures(frames):
+    """(section, title, figure) in dashboard tab order, using the dashboard's own builders."""
+    fig_spec, fig_pie = rf.specialist_figures(frames["specialists"])
+    fig_age, fig_gender = rf.demographic_figures(frames["age"], frames["gender"])
+    figs = [
+        ("Symptoms", "Symptom Frequency (All)", rf.symptom_figure(frames["symptoms"].head(TOP_N))),
+        ("Symptoms", "Symptom Frequency (Chief Complaints)",
+         rf.symptom_figure(frames["initial_symptoms"].head(TOP_N))),
+        ("Specialist Load", "Specialist Frequency (Leaderboard)", fig_spec),
+        ("Specialist Load", "Share of Total (Top 10)", fig_pie),
+        ("Demographics", "Age Distribution (Buckets)", fig_age),
+        ("Demographics", "Gender Distribution", fig_gender),
+    ]
+    top = rf.top_durations(frames["durations"], DURATION_TOP_N)
+    if top:
+        figs.append(("Duration Explorer", f"Top {len(top)} symptoms by volume (pick one)",
+                     rf.duration_explorer_figure(top)))
+    if not frames["data_quality"].empty:
+        figs.append(("Data Quality", "Data Quality (measured)", rf.data_quality_figure(frames["data_quality"])))
+    return figs
+
+def bundle_is_current(out_dir, digest):
+    """True if the manifest matches this snapshot hash and every file it lists still exists."""
+    try:
+        manifest = json.loads((out_dir / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    if manifest.get("hash") != digest:
+        return False
+    return all((out_dir / name).exists() for name in manifest.get("files", []))
+
+def render_html(snap, figs):
+    title = f"O-Health • Triage Insights — {snap.get('hospital', '')} {snap.get('window', '')}".strip()
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<title>{html.escape(title)}</title>",
+        # bundled next to index.html so the folder works offline when shared on its own
+        "<script src='plotly.min.js'></script>",
+        "<style>body{font-family:sans-serif;margin:24px;}h3{margin-top:28px;}</style>",
+        "</head><body>",
+        f"<h2>{html.escape(title)}</h2>",
+        f"<p>Rows: <b>{snap.get('total_rows', 0)}</b> • Unique symptoms: "
+        f"<b>{snap.get('total_unique_symptoms', 0)}</b> • Ages: <b>{snap.get('age_count', 0)}</b> "
+        f"(mean {snap.get('age_mean', '–')}, median {snap.get('age_median', '–')})</p>",
+    ]
+    section = None
+    for sec, sub, fig in figs:
+        if sec != section:
+            parts.append(f"<h2>{html.escape(sec)}</h2>")
+            section = sec
+        parts.append(f"<h3>{html.escape(sub)}</h3>")
+        parts.append(fig.to_html(full_html=False, include_plotlyjs=False))
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+def write_extract(df, out_base):
+    """Parquet when pyarrow/fastparquet is available, else CSV."""
+    try:
+        df.to_parquet(f"{out_base}.parquet", index=False)
+        return f"{out_base}.parquet"
+    except ImportError:
+        df.to_csv(f"{out_base}.csv", index=False)
+        return f"{out_base}.csv"
+
+# ---------------- EXPORT ----------------
+def export_bundle(snapshot_path, export_dir=EXPORT_DIR):
+    """Render one snapshot into <export_dir>/<snapshot stem>/. Returns (name, status)."""
+    snapshot_path = Path(snapshot_path)
+    raw = snapshot_path.read_bytes()
+    digest = snapshot_hash(raw)
+    out_dir = Path(export_dir) / snapshot_path.stem
+    manifest_path = out_dir / "manifest.json"
+
+    if bundle_is_current(out_dir, digest):
+        return snapshot_path.stem, "unchanged"
+
+    snap = json.loads(raw)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    frames = rf.build_frames(snap)
+    figs = build_figures(frames)
+
+    (out_dir / "index.html").write_text(render_html(snap, figs), encoding="utf-8")
+    (out_dir / "plotly.min.js").write_text(get_plotlyjs(), encoding="utf-8")
+    files = ["index.html", "plotly.min.js"]
+    extracts = dict(frames, durations=rf.durations_long(frames["durations"]))
+    for key, df in extracts.items():
+        files.append(Path(write_extract(df, out_dir / key)).name)
+
+    if EXPORT_PNG:
+        try:
+            for i, (_, sub, fig) in enumerate(figs):
+                name = f"{i:02d}_{''.join(c if c.isalnum() else '_' for c in sub.lower())}.png"
+                fig.write_image(out_dir / name)
+                files.append(name)
+        except (ImportError, ValueError) as e:
+            print(f"⚠️ PNG export skipped for {snapshot_path.stem}: {e}")
+
+    # manifest last: a bundle interrupted mid-write is re-rendered next run
+    manifest = {"hash": digest, "snapshot": str(snapshot_path), "files": files}
+    manifest_path.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    return snapshot_path.stem, "exported"
+
+def main():
+    snapshots = sorted(Path(SNAPSHOT_DIR).glob("*.json"))
+    if not snapshots:
+        print(f"No snapshots found in {SNAPSHOT_DIR}/ (run stats_hospital.py first).")
+        return
+
+    Path(EXPORT_DIR).mkdir(parents=True, exist_ok=True)
+    t0 = time.time()
+    counts = {"exported": 0, "unchanged": 0, "failed": 0}
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        futures = {pool.submit(export_bundle, p, EXPORT_DIR): p for p in snapshots}
+        for fut, path in futures.items():
+            try:
+                name, status = fut.result()
+            except Exception as e:
+                print(f"❌ {path.stem}: {e}")
+                counts["failed"] += 1
+                continue
+            counts[status] += 1
+            if status == "exported":
+                print(f"✅ {name}")
+
+    print(f"Saved bundles to {EXPORT_DIR}/ | exported: {counts['exported']} | "
+          f"unchanged: {counts['unchanged']} | failed: {counts['failed']} | {time.time() - t0:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@ import csv
 import json
 import time
 import re
+import random
+import argparse
+import os
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 
 URL = "https://prod.o-health.in/api/v2/admin/getCompleteReport"
@@ -10,14 +14,36 @@ OUTPUT_CSV = "report_v2_Balrampur_jan16_feb2.csv"
 
 TIMEOUT = 20
 SLEEP_BETWEEN = 0.25
-RETRIES = 2
+RETRIES = 4
+
+# Backoff: BACKOFF_BASE * 2**attempt with full jitter, capped at BACKOFF_MAX.
+# A Retry-After header replaces the backoff and is honoured up to RETRY_AFTER_MAX.
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_AFTER_MAX = 600.0
+
+# Pacing: gap between ids doubles on server trouble and decays back on success
+SLEEP_MAX = 10.0
+
+# Circuit breaker: after this many consecutive 5xx/network failures, pause all fetching
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 60.0
 
 LIST_RAW = """
 6636-7916
 """
 
+# Split the work across parallel runs: `python fetch_reptr.py --shard K/N` for K in 0..N-1,
+# then `python fetch_reptr.py --merge` to fold the shard CSVs into OUTPUT_CSV
+SHARD_COUNT = 1
+SHARD_INDEX = 0
+
 def parse_ids(raw: str):
-    ids, seen = [], set()
+    """
+    Parse '11-1135, 1200 1300–1310' into merged, sorted inclusive ranges [(a, b), ...].
+    Memory is O(number of ranges), so millions of IDs plan instantly.
+    """
+    spans = []
     tokens = re.split(r"[,\s]+", raw.strip())
     dash = r"[-–—]"
 
@@ -30,90 +56,355 @@ def parse_ids(raw: str):
             a, b = int(a_s), int(b_s)
             if a > b:
                 a, b = b, a
-            # sanity cap to avoid gigantic expansions by mistake
-            if b - a > 500_000:
-                print(f"⚠️ Skipping suspiciously large range: {tok}")
-                continue
-            for n in range(a, b + 1):
-                if n not in seen:
-                    seen.add(n)
-                    ids.append(n)
+            spans.append((a, b))
             continue
         # Standalone integer
         if re.fullmatch(r"\d+", tok):
             n = int(tok)
-            if n not in seen:
-                seen.add(n)
-                ids.append(n)
+            spans.append((n, n))
             continue
-        # else ignore tokens with letters/mixed content
-    return ids
+        print(f"⚠️ Ignoring token that is not an id or range: {tok!r}")
+    return merge_ranges(spans)
+
+def merge_ranges(spans):
+    merged = []
+    for a, b in sorted(spans):
+        if merged and a <= merged[-1][1] + 1:
+            if b > merged[-1][1]:
+                merged[-1] = (merged[-1][0], b)
+        else:
+            merged.append((a, b))
+    return merged
+
+def count_ids(ranges):
+    return sum(b - a + 1 for a, b in ranges)
+
+def iter_ids(ranges):
+    """Lazily yield every id in the ranges, in ascending order."""
+    for a, b in ranges:
+        yield from range(a, b + 1)
+
+def subtract_ids(ranges, done):
+    """Remove already-fetched ids (any iterable of ints) from the ranges."""
+    out = []
+    holes = merge_ranges((n, n) for n in done)
+    i = 0
+    for a, b in ranges:
+        while i < len(holes) and holes[i][1] < a:
+            i += 1
+        j = i
+        while j < len(holes) and holes[j][0] <= b:
+            ha, hb = holes[j]
+            if ha > a:
+                out.append((a, ha - 1))
+            a = max(a, hb + 1)
+            j += 1
+        if a <= b:
+            out.append((a, b))
+    return out
+
+def shard_ranges(ranges, shard_count):
+    """Split ranges into shard_count contiguous shards of near-equal id counts."""
+    total = count_ids(ranges)
+    shards = [[] for _ in range(shard_count)]
+    if not total:
+        return shards
+    base, extra = divmod(total, shard_count)
+    sizes = [base + (1 if k < extra else 0) for k in range(shard_count)]
+    k = 0
+    for a, b in ranges:
+        while a <= b:
+            while k < shard_count - 1 and sizes[k] == 0:
+                k += 1
+            take = min(b - a + 1, sizes[k]) if k < shard_count - 1 else b - a + 1
+            shards[k].append((a, a + take - 1))
+            sizes[k] -= take
+            a += take
+    return shards
+
+def shard_output_csv(shard_index=SHARD_INDEX, shard_count=SHARD_COUNT):
+    """Each shard appends to its own file so parallel runs never interleave rows."""
+    if shard_count == 1:
+        return OUTPUT_CSV
+    out = Path(OUTPUT_CSV)
+    return str(out.with_name(f"{out.stem}.shard{shard_index}of{shard_count}{out.suffix}"))
+
+def shard_output_csvs():
+    out = Path(OUTPUT_CSV)
+    return sorted(out.parent.glob(f"{out.stem}.shard*of*{out.suffix}"))
+
+def migrate_output_csv(path):
+    """
+    Rewrite an old one-column (report_json) output file into [report_json, assessment_id]
+    so new rows can be appended to it. The id is recovered from the report's own
+    `assessment_id` field only; rows without it are moved to <name>.unidentified.csv
+    (kept, but no longer read downstream) since they will be fetched again.
+    """
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None or header == OUTPUT_HEADER:
+            return
+        rows = [row for row in reader if row]
+
+    kept, unidentified = [], []
+    for row in rows:
+        try:
+            obj = json.loads(row[0])
+        except ValueError:
+            obj = None
+        rid = obj.get("assessment_id") if isinstance(obj, dict) else None
+        if isinstance(rid, int) or (isinstance(rid, str) and rid.isdigit()):
+            kept.append([row[0], int(rid)])
+        else:
+            unidentified.append([row[0]])
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(OUTPUT_HEADER)
+        writer.writerows(kept)
+    if unidentified:
+        side = path.with_name(f"{path.stem}.unidentified{path.suffix}")
+        side_exists = side.exists()
+        with open(side, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if not side_exists:
+                writer.writerow(["report_json"])
+            writer.writerows(unidentified)
+        print(f"⚠️ {len(unidentified)} rows in {path} have no assessment_id; moved to {side} "
+              f"and their ids will be fetched again")
+    os.replace(tmp, path)
+    print(f"Migrated {path} to the report_json,assessment_id format ({len(kept)} rows kept)")
+
+def read_saved_rows(path):
+    """
+    Yield (assessment_id, report_json) for rows in an output CSV. The id is the one we
+    requested, recorded in the second column; rows written before it existed yield None.
+    """
+    if not Path(path).exists():
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        for row in reader:
+            if not row:
+                continue
+            rid = row[1].strip() if len(row) > 1 else ""
+            yield (int(rid) if rid.isdigit() else None), row[0]
+
+def fetched_ids(*paths):
+    """Ids already saved in earlier output files, so reruns resume instead of refetching."""
+    done, unknown = set(), 0
+    for path in paths:
+        for rid, _ in read_saved_rows(path):
+            if rid is None:
+                unknown += 1
+            else:
+                done.add(rid)
+    if unknown:
+        print(f"⚠️ {unknown} saved rows have no recorded assessment_id; their ids will be fetched again")
+    return done
+
+def merge_shards():
+    """Append shard rows to OUTPUT_CSV (skipping ids it already has); shard files are kept."""
+    migrate_output_csv(OUTPUT_CSV)
+    done = fetched_ids(OUTPUT_CSV)
+    file_exists = Path(OUTPUT_CSV).exists()
+    added = 0
+    with open(OUTPUT_CSV, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if not file_exists:
+            writer.writerow(OUTPUT_HEADER)
+        for path in shard_output_csvs():
+            for rid, report_json in read_saved_rows(path):
+                if rid is None or rid in done:
+                    continue
+                writer.writerow([report_json, rid])
+                done.add(rid)
+                added += 1
+    print(f"Merged {added} rows from {len(shard_output_csvs())} shard files into {OUTPUT_CSV}")
 
 REPORT_IDS = parse_ids(LIST_RAW)
 
+OUTPUT_HEADER = ["report_json", "assessment_id"]
+
 HEADERS = {
     "Content-Type": "application/json",
     # add auth headers here if your dev server requires them, e.g.:
     # "Authorization": "Bearer <TOKEN>"
 }
 
+PAYLOAD_KEYS = ("assessment_id", "reportId")
+
+# Adaptive state shared by every fetch in this run
+_state = {
+    "payload_key": PAYLOAD_KEYS[0],  # key that last worked; tried first
+    "sleep": SLEEP_BETWEEN,          # current gap between ids
+    "failures": 0,                   # consecutive 5xx/network failures
+}
+
+# Local misconfiguration: retrying or skipping would just repeat it for every id
+CONFIG_ERRORS = (
+    requests.exceptions.InvalidURL,
+    requests.exceptions.MissingSchema,
+    requests.exceptions.InvalidSchema,
+    requests.exceptions.InvalidHeader,
+)
+
 def _post(payload):
     r = requests.post(URL, json=payload, headers=HEADERS, timeout=TIMEOUT)
     # raise for 4xx/5xx so we trigger retries/fallback
     r.raise_for_status()
     return r
 
+def _status(err):
+    resp = getattr(err, "response", None)
+    return resp.status_code if resp is not None else None
+
+def _resp_text(err):
+    resp = getattr(err, "response", None)
+    if resp is None:
+        return ""
+    try:
+        return resp.text
+    except Exception:
+        return ""
+
+def _retry_after(err):
+    """Seconds requested by a Retry-After header (delta or HTTP date), else None."""
+    resp = getattr(err, "response", None)
+    value = resp.headers.get("Retry-After") if resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _backoff(attempt, err):
+    wait = _retry_after(err)
+    if wait is not None:
+        return min(wait, RETRY_AFTER_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def _is_server_trouble(err):
+    """5xx/429 or a transport failure; bad URLs and other local errors are not the server's fault."""
+    status = _status(err)
+    if status is None:
+        return isinstance(err, (requests.ConnectionError, requests.Timeout,
+                                requests.exceptions.ChunkedEncodingError))
+    return status >= 500 or status == 429
+
+def _record_success():
+    _state["failures"] = 0
+    _state["sleep"] = max(SLEEP_BETWEEN, _state["sleep"] * 0.8)
+
+def _record_trouble():
+    _state["failures"] += 1
+    _state["sleep"] = min(SLEEP_MAX, _state["sleep"] * 2)
+    if _state["failures"] >= BREAKER_THRESHOLD:
+        print(f"⏸️ Circuit open after {_state['failures']} consecutive server errors; "
+              f"pausing {BREAKER_COOLDOWN:.0f}s")
+        time.sleep(BREAKER_COOLDOWN)
+        # half-open: let the next request probe; one more failure re-opens
+        _state["failures"] = BREAKER_THRESHOLD - 1
+
 def fetch_report(assessment_id: int):
     """
     Primary:      {'assessment_id': id}  <-- v2 expects this (works in Postman)
-    Compatibility: if it fails, retry once with {'reportId': id}
+    Compatibility: on a 4xx, try {'reportId': id}; whichever key works is tried first next time.
+    5xx/429/network errors retry the same key with jittered exponential backoff.
+    Config errors (bad URL/schema/header) raise; any other failure skips just this id.
     """
-    last_err = None
-    # try with assessment_id first
-    for attempt in range(1, RETRIES + 1):
-        try:
-            r = _post({"assessment_id": assessment_id})
-            return r.json()
-        except requests.RequestException as e:
-            last_err = e
-            if attempt < RETRIES:
-                time.sleep(0.5)
-            else:
-                # fallback exactly once with legacy key
-                try:
-                    r2 = _post({"reportId": assessment_id})
-                    return r2.json()
-                except requests.RequestException as e2:
-                    # print server message bodies if available
-                    resp_text = ""
-                    if hasattr(e, "response") and e.response is not None:
-                        try:
-                            resp_text = e.response.text
-                        except Exception:
-                            pass
-                    resp_text2 = ""
-                    if hasattr(e2, "response") and e2.response is not None:
-                        try:
-                            resp_text2 = e2.response.text
-                        except Exception:
-                            pass
-                    print(f"❌ Skipped id {assessment_id}: primary error={e}; resp={resp_text[:300]}")
-                    print(f"   ↳ Fallback error={e2}; resp={resp_text2[:300]}")
-                    return None
-
-def main():
-    print(f"Total unique report IDs to fetch: {len(REPORT_IDS)}")
-    file_exists = Path(OUTPUT_CSV).exists()
-    with open(OUTPUT_CSV, "a", newline="", encoding="utf-8") as f:
+    keys = [_state["payload_key"]] + [k for k in PAYLOAD_KEYS if k != _state["payload_key"]]
+    errors = []
+    for key in keys:
+        for attempt in range(RETRIES):
+            try:
+                r = _post({key: assessment_id})
+            except requests.RequestException as e:
+                errors.append((key, e))
+                if isinstance(e, CONFIG_ERRORS):
+                    raise  # every id would fail the same way
+                if _status(e) is None and not _is_server_trouble(e):
+                    return _skip(assessment_id, errors)  # e.g. one undecodable body
+                if not _is_server_trouble(e):
+                    break  # client error: this payload key is rejected, try the other one
+                _record_trouble()
+                if attempt < RETRIES - 1:
+                    time.sleep(_backoff(attempt, e))
+                continue
+            try:
+                data = r.json()
+            except ValueError as e:
+                # 2xx with a non-JSON body: the key was accepted, so don't fall back or switch keys
+                errors.append((key, e))
+                return _skip(assessment_id, errors)
+            _record_success()
+            _state["payload_key"] = key
+            return data
+        else:
+            # retries exhausted on server errors; the other key won't fare better
+            break
+    return _skip(assessment_id, errors)
+
+def _skip(assessment_id, errors):
+    print(f"❌ Skipped id {assessment_id}:")
+    for key, e in errors[-2:]:
+        print(f"   ↳ {key}: error={e}; resp={_resp_text(e)[:300]}")
+    return None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch v2 complete reports into OUTPUT_CSV.")
+    parser.add_argument("--shard", default=f"{SHARD_INDEX}/{SHARD_COUNT}",
+                        help="K/N: fetch only shard K (0-based) of N, into its own CSV")
+    parser.add_argument("--merge", action="store_true",
+                        help="append all shard CSVs into OUTPUT_CSV and exit")
+    args = parser.parse_args(argv)
+    try:
+        k, n = (int(x) for x in args.shard.split("/"))
+    except ValueError:
+        parser.error(f"--shard must look like K/N, got {args.shard!r}")
+    if not 0 <= k < n:
+        parser.error(f"--shard needs 0 <= K < N, got {args.shard!r}")
+    args.shard_index, args.shard_count = k, n
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.merge:
+        merge_shards()
+        return
+
+    # shard first (deterministic across runs), then drop ids already saved
+    k, n = args.shard_index, args.shard_count
+    output_csv = shard_output_csv(k, n)
+    for path in {OUTPUT_CSV, output_csv}:
+        migrate_output_csv(path)
+    shard = shard_ranges(REPORT_IDS, n)[k]
+    work = subtract_ids(shard, fetched_ids(*{OUTPUT_CSV, output_csv}))
+    total = count_ids(work)
+    print(f"Total unique report IDs: {count_ids(REPORT_IDS)} | shard {k + 1}/{n}: "
+          f"{count_ids(shard)} | pending: {total}")
+    file_exists = Path(output_csv).exists()
+    with open(output_csv, "a", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         if not file_exists:
-            writer.writerow(["report_json"])
-        for idx, assessment_id in enumerate(REPORT_IDS, 1):
+            writer.writerow(OUTPUT_HEADER)
+        for idx, assessment_id in enumerate(iter_ids(work), 1):
             data = fetch_report(assessment_id)
             if data is not None:
-                writer.writerow([json.dumps(data, ensure_ascii=False)])
-                print(f"✅ Saved id {assessment_id}  ({idx}/{len(REPORT_IDS)})")
-            time.sleep(SLEEP_BETWEEN)
+                writer.writerow([json.dumps(data, ensure_ascii=False), assessment_id])
+                print(f"✅ Saved id {assessment_id}  ({idx}/{total})")
+            time.sleep(_state["sleep"])
 
 if __name__ == "__main__":
     main()
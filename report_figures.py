@@ -0,0 +1,116 @@
+import pandas as pd
+import plotly.graph_objects as go
+
+# Frame and figure builders shared by dashboard_ohealth_stats.py and export_report_bundles.py,
+# so the live dashboard and the static bundles always draw the same charts.
+# Figures use graph_objects directly: plotly.express costs ~50 ms per figure, which
+# dominates the bundle export.
+
+# ---------------- FRAMES ----------------
+def dict_to_df(d, col_key="label", col_val="count"):
+    df = pd.DataFrame(list(d.items()), columns=[col_key, col_val])
+    df = df.sort_values(col_val, ascending=False)
+    return df
+
+def data_quality_frame(data_quality):
+    """Long (column, issue, count) frame from a snapshot's "data_quality" block; zero counts dropped."""
+    rows = [
+        (col, issue, cnt)
+        for col, issues in (data_quality or {}).get("columns", {}).items()
+        for issue, cnt in issues.items()
+        if cnt
+    ]
+    return pd.DataFrame(rows, columns=["column", "issue", "count"])
+
+def build_frames(snap):
+    """Sorted frames for every dashboard tab from a stats snapshot dict (stats_hospital.py keys)."""
+    return {
+        "symptoms": dict_to_df(snap.get("symptoms_freq", {}), "symptom", "count"),
+        "initial_symptoms": dict_to_df(snap.get("initial_symptoms_freq", {}), "symptom", "count"),
+        "specialists": dict_to_df(snap.get("specialists_freq", {}), "specialist", "count"),
+        "age": dict_to_df(snap.get("age_buckets", {}), "age_range", "count"),
+        "gender": dict_to_df(snap.get("gender_freq", {}), "gender", "count"),
+        "durations": {
+            sym: dict_to_df(d, "duration", "count")
+            for sym, d in snap.get("symptom_duration_map", {}).items() if d
+        },
+        "data_quality": data_quality_frame(snap.get("data_quality")),
+    }
+
+def durations_long(durations):
+    """Per-symptom duration frames flattened into one (symptom, duration, count) table."""
+    rows = [
+        (sym, dur, cnt)
+        for sym, df in sorted(durations.items())
+        for dur, cnt in zip(df["duration"], df["count"])
+    ]
+    return pd.DataFrame(rows, columns=["symptom", "duration", "count"])
+
+# ---------------- FIGURES ----------------
+def _layout(fig, height, **layout):
+    fig.update_layout(height=height, margin=dict(l=10, r=10, t=30, b=10), **layout)
+    return fig
+
+def _bar(df, x, y, height, orientation=None):
+    fig = go.Figure(go.Bar(
+        x=df[x], y=df[y], orientation=orientation, text=df[x if orientation == "h" else y],
+        hovertemplate=f"{x}=%{{x}}<br>{y}=%{{y}}<extra></extra>",
+    ))
+    return _layout(fig, height, xaxis_title=x, yaxis_title=y)
+
+def hbar(df, x, y, height):
+    return _bar(df.sort_values(x, ascending=True), x, y, height, orientation="h")
+
+def symptom_figure(df_sym):
+    return hbar(df_sym, "count", "symptom", 520)
+
+def specialist_figures(df_spec):
+    """(Top-25 leaderboard bar, top-10 share donut)."""
+    fig_bar = hbar(df_spec.head(25), "count", "specialist", 560)
+    df_pie = df_spec.head(10)
+    fig_pie = go.Figure(go.Pie(labels=df_pie["specialist"], values=df_pie["count"], hole=0.45))
+    return fig_bar, _layout(fig_pie, 560)
+
+def demographic_figures(df_age, df_gender):
+    return _bar(df_age, "age_range", "count", 420), _bar(df_gender, "gender", "count", 420)
+
+def top_durations(durations, n):
+    """The n symptoms with the most duration answers, largest first."""
+    return sorted(durations.items(), key=lambda kv: kv[1]["count"].sum(), reverse=True)[:n]
+
+def duration_figure(df_dur):
+    return hbar(df_dur, "count", "duration", 480)
+
+def duration_explorer_figure(items):
+    """
+    One chart for many symptoms: a dropdown picks the symptom (like the dashboard's
+    selectbox). `items` is [(symptom, duration frame), ...]; the first is shown initially.
+    """
+    fig = go.Figure()
+    for i, (sym, df_dur) in enumerate(items):
+        df_dur = df_dur.sort_values("count", ascending=True)
+        fig.add_trace(go.Bar(
+            x=df_dur["count"], y=df_dur["duration"], orientation="h", text=df_dur["count"],
+            name=sym, visible=(i == 0),
+            hovertemplate="count=%{x}<br>duration=%{y}<extra></extra>",
+        ))
+    buttons = [
+        dict(label=sym, method="update",
+             args=[{"visible": [j == i for j in range(len(items))]}, {"title.text": sym}])
+        for i, (sym, _) in enumerate(items)
+    ]
+    return _layout(
+        fig, 480, xaxis_title="count", yaxis_title="duration",
+        title_text=items[0][0] if items else "",
+        updatemenus=[dict(buttons=buttons, direction="down", x=1, xanchor="right", y=1.12)],
+    )
+
+def data_quality_figure(df_dq):
+    """Stacked horizontal bar: one segment per issue class, one bar per column."""
+    fig = go.Figure([
+        go.Bar(x=df_issue["count"], y=df_issue["column"], orientation="h", text=df_issue["count"], name=issue,
+               hovertemplate=f"issue={issue}<br>count=%{{x}}<br>column=%{{y}}<extra></extra>")
+        for issue, df_issue in df_dq.groupby("issue", sort=False)
+    ])
+    return _layout(fig, 420, barmode="relative", xaxis_title="count", yaxis_title="column",
+                   legend_title_text="issue")
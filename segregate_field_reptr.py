@@ -29,9 +29,16 @@ df = pd.read_csv(INPUT_CSV, header=None, dtype=str)
 col0 = df.columns[0]
 
 rows = []
+unparseable, not_dict = 0, 0
 for raw in df[col0].tolist():
+    if raw == "report_json":  # header row written by fetch_reptr.py
+        continue
     obj = safe_json_loads(raw)
+    if obj is None:
+        unparseable += 1
+        continue
     if not isinstance(obj, dict):
+        not_dict += 1
         continue
 
     if obj.get("hospital_id") != 6:
@@ -74,6 +81,7 @@ out = pd.DataFrame(rows, columns=[
 
 out.to_csv(OUTPUT_CSV, index=False)
 
-print(f"Saved: {OUTPUT_CSV} | rows: {len(out)}")
+print(f"Saved: {OUTPUT_CSV} | rows: {len(out)} | skipped unparseable JSON: {unparseable} "
+      f"| skipped non-object JSON: {not_dict}")
 print("\nGender distribution:")
 print(out["gender"].value_counts(dropna=False))
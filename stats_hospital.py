@@ -1,4 +1,6 @@
 import json
+import os
+from pathlib import Path
 import pandas as pd
 from collections import Counter, defaultdict
 import numpy as np
@@ -6,21 +8,30 @@ import numpy as np
 # ---------------- CONFIG ----------------
 INPUT_CSV = "repore_v2_Balrampur_jan16_feb2_with_specialist.csv"
 
+# Aggregate snapshot (read by export_report_bundles.py); one file per hospital + date window
+HOSPITAL = "Balrampur"
+WINDOW = "jan16_feb2"
+SNAPSHOT_JSON = f"snapshots/{HOSPITAL}_{WINDOW}.json"
+
 # Columns expected:
 # raw_json, lifestyle_factors, age, gender, symptoms, symptom_duration, initial_symptom, suggested_specialist
 
 # ---------------- HELPERS ----------------
-def parse_jsonish(cell):
-    """Parse list/dict stored as JSON string; if plain string, return it; if empty -> None."""
+def parse_jsonish_status(cell):
+    """Like parse_jsonish, but also returns how it parsed: 'null', 'json' or 'text'."""
     if cell is None or (isinstance(cell, float) and pd.isna(cell)):
-        return None
+        return None, "null"
     s = str(cell).strip()
     if not s:
-        return None
+        return None, "null"
     try:
-        return json.loads(s)
+        return json.loads(s), "json"
     except Exception:
-        return s
+        return s, "text"
+
+def parse_jsonish(cell):
+    """Parse list/dict stored as JSON string; if plain string, return it; if empty -> None."""
+    return parse_jsonish_status(cell)[0]
 
 def as_list(x):
     """Normalize values into a list of strings when possible."""
@@ -68,6 +79,49 @@ def compute_associated(symptoms_list, initial_list):
     assoc = [s for s in symptoms_list if normalize_symptom(s) not in init_set]
     return assoc
 
+CANONICAL_GENDERS = {"M", "F"}
+
+def is_blank(x):
+    return x is None or (isinstance(x, float) and pd.isna(x)) or not str(x).strip()
+
+def profile_jsonish(dq, col, cell):
+    """parse_jsonish_status that also counts nulls / unparseable JSON for `col` into dq."""
+    val, status = parse_jsonish_status(cell)
+    if status == "null":
+        dq[col]["null"] += 1
+    elif status == "text":
+        dq[col]["unparseable_json"] += 1
+    return val, status
+
+AGE_BINS = [(0,12),(13,17),(18,29),(30,44),(45,59),(60,74),(75,120)]
+
+def age_summary(ages):
+    if not ages:
+        return {"age_count": 0, "age_buckets": {}}
+    ages_arr = np.array(ages, dtype=float)
+    return {
+        "age_count": len(ages),
+        "age_min": int(np.min(ages_arr)),
+        "age_max": int(np.max(ages_arr)),
+        "age_mean": round(float(np.mean(ages_arr)), 2),
+        "age_median": round(float(np.median(ages_arr)), 2),
+        "age_buckets": {
+            f"{lo}-{hi}": int(((ages_arr >= lo) & (ages_arr <= hi)).sum()) for lo, hi in AGE_BINS
+        },
+    }
+
+def write_snapshot(path, snapshot):
+    """
+    Write the aggregate snapshot as stable (sorted-key) JSON so unchanged stats hash the same.
+    Written to a temp file and renamed, so readers never see a half-written snapshot.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
 # ---------------- MAIN ----------------
 def main():
     df = pd.read_csv(INPUT_CSV, dtype=str)
@@ -86,14 +140,22 @@ def main():
     # Associated symptom duration mapping
     associated_duration_map = defaultdict(Counter)
 
+    # Data-quality profile, filled in the same pass: column -> Counter(issue)
+    dq = defaultdict(Counter)
+    gender_variants = Counter()
+
     for _, row in df.iterrows():
         # ---- Symptoms frequency ----
-        symptoms = as_list(parse_jsonish(row.get("symptoms")))
+        symptoms = as_list(profile_jsonish(dq, "symptoms", row.get("symptoms"))[0])
         symptoms_norm = [normalize_symptom(s) for s in symptoms]
         symptoms_freq.update([s for s in symptoms_norm if s])
 
         # ---- Initial symptoms frequency ----
-        init_sym = as_list(parse_jsonish(row.get("initial_symptom")))
+        init_raw, init_status = profile_jsonish(dq, "initial_symptom", row.get("initial_symptom"))
+        init_sym = as_list(init_raw)
+        # issue classes are exclusive per cell: a null cell is "null", not also "empty"
+        if not init_sym and init_status != "null":
+            dq["initial_symptom"]["empty"] += 1
         init_norm = [normalize_symptom(s) for s in init_sym]
         initial_symptoms_freq.update([s for s in init_norm if s])
 
@@ -103,7 +165,9 @@ def main():
         associated_symptoms_freq.update([s for s in assoc_norm if s])
 
         # ---- Symptom duration mapping ----
-        sd = parse_jsonish(row.get("symptom_duration"))
+        sd, sd_status = profile_jsonish(dq, "symptom_duration", row.get("symptom_duration"))
+        if sd_status == "json" and not isinstance(sd, dict):
+            dq["symptom_duration"]["not_dict"] += 1
         if isinstance(sd, dict):
             for k, v in sd.items():
                 sym = normalize_symptom(k)
@@ -124,18 +188,29 @@ def main():
         specialist = str(spec_raw).strip() if pd.notna(spec_raw) else ""
         if specialist:
             specialists_freq.update([specialist])
+        else:
+            dq["suggested_specialist"]["null"] += 1
 
         # ---- Gender frequency ----
         gender_raw = row.get("gender")
         gender = str(gender_raw).strip() if pd.notna(gender_raw) else ""
         if not gender:
             gender = "(missing)"
+            dq["gender"]["null"] += 1
+        elif gender not in CANONICAL_GENDERS:
+            dq["gender"]["non_canonical"] += 1
+            gender_variants.update([gender])
         gender_freq.update([gender])
 
         # ---- Age stats ----
-        age = safe_int(row.get("age"))
+        age_raw = row.get("age")
+        age = safe_int(age_raw)
         if age is not None:
             ages.append(age)
+        elif is_blank(age_raw):
+            dq["age"]["null"] += 1
+        else:
+            dq["age"]["unparsed"] += 1
 
     # ---------------- PRINTS ----------------
     print("\n==================== STATS ====================\n")
@@ -167,19 +242,15 @@ def main():
 
     # 4) age statistics
     print("4) Age statistics:")
+    age_stats = age_summary(ages)
     if ages:
-        ages_arr = np.array(ages, dtype=float)
-        print(f"  Count: {len(ages)}")
-        print(f"  Min: {int(np.min(ages_arr))}")
-        print(f"  Max: {int(np.max(ages_arr))}")
-        print(f"  Mean: {np.mean(ages_arr):.2f}")
-        print(f"  Median: {np.median(ages_arr):.2f}")
-        bins = [(0,12),(13,17),(18,29),(30,44),(45,59),(60,74),(75,120)]
-        bucket_counts = {}
-        for lo, hi in bins:
-            bucket_counts[f"{lo}-{hi}"] = int(((ages_arr >= lo) & (ages_arr <= hi)).sum())
+        print(f"  Count: {age_stats['age_count']}")
+        print(f"  Min: {age_stats['age_min']}")
+        print(f"  Max: {age_stats['age_max']}")
+        print(f"  Mean: {age_stats['age_mean']:.2f}")
+        print(f"  Median: {age_stats['age_median']:.2f}")
         print("  Buckets:")
-        for k, v in bucket_counts.items():
+        for k, v in age_stats["age_buckets"].items():
             print(f"    {k}: {v}")
     else:
         print("  (No ages found.)")
@@ -214,6 +285,42 @@ def main():
         print("  (No associated symptom duration pairs found in symptom_duration dicts.)")
     print()
 
+    # 9) data quality
+    print("9) Data quality (per column):")
+    for col in sorted(dq):
+        issues = ", ".join(f"{k}={v}" for k, v in sorted(dq[col].items()))
+        print(f"  {col}: {issues}")
+    if gender_variants:
+        print("  Non-canonical gender values: " +
+              ", ".join(f"{g}({c})" for g, c in gender_variants.most_common()))
+    if not dq:
+        print("  (No data-quality issues found.)")
+    print()
+
+    # ---------------- SNAPSHOT ----------------
+    snapshot = {
+        "hospital": HOSPITAL,
+        "window": WINDOW,
+        "source_csv": INPUT_CSV,
+        "total_rows": len(df),
+        "symptoms_freq": dict(symptoms_freq.most_common()),
+        "total_unique_symptoms": len(symptoms_freq),
+        "symptom_duration_map": {sym: dict(c.most_common()) for sym, c in sym_by_dur},
+        "specialists_freq": dict(specialists_freq.most_common()),
+        "gender_freq": dict(gender_freq.most_common()),
+        "initial_symptoms_freq": dict(initial_symptoms_freq.most_common()),
+        "total_unique_initial_symptoms": len(initial_symptoms_freq),
+        "associated_symptoms_freq": dict(associated_symptoms_freq.most_common()),
+        "associated_duration_map": {sym: dict(c.most_common()) for sym, c in assoc_by_dur},
+        **age_stats,
+        "data_quality": {
+            "columns": {col: dict(sorted(c.items())) for col, c in sorted(dq.items())},
+            "gender_variants": dict(gender_variants.most_common()),
+        },
+    }
+    write_snapshot(SNAPSHOT_JSON, snapshot)
+    print(f"Saved snapshot: {SNAPSHOT_JSON}\n")
+
     print("==================== DONE =====================\n")
 
 
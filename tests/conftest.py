@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# scripts live at the repo root, not in a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+DASHBOARD = str(Path(__file__).resolve().parent.parent / "dashboard_ohealth_stats.py")
+
+SNAPSHOT = {
+    "hospital": "Balrampur",
+    "window": "jan16_feb2",
+    "total_rows": 3,
+    "total_unique_symptoms": 2,
+    "symptoms_freq": {"fever": 2, "cough": 1},
+    "initial_symptoms_freq": {"fever": 2},
+    "specialists_freq": {"General Medicine": 3},
+    "age_buckets": {"0-12": 1, "18-29": 2},
+    "age_count": 3,
+    "gender_freq": {"F": 1, "male": 1, "(missing)": 1},
+    "symptom_duration_map": {"fever": {"2 days": 2}},
+    "data_quality": {
+        "columns": {"gender": {"null": 1, "non_canonical": 1}},
+        "gender_variants": {"male": 1},
+    },
+}
+
+
+def run_dashboard(tmp_path, monkeypatch, content=None):
+    monkeypatch.chdir(tmp_path)
+    if content is not None:
+        (tmp_path / "snapshots").mkdir()
+        (tmp_path / "snapshots" / "Balrampur_jan16_feb2.json").write_text(content, encoding="utf-8")
+    st.cache_resource.clear()
+    at = AppTest.from_file(DASHBOARD, default_timeout=30).run()
+    assert not at.exception
+    return at
+
+
+def messages(at):
+    return [el.value for el in list(at.info) + list(at.success) + list(at.warning) + list(at.caption)]
+
+
+@pytest.mark.parametrize("content, expected", [
+    (None, "No snapshot found"),
+    ("{not json", "Could not read"),
+    (json.dumps({"data_quality": {}}), "is not a stats snapshot"),
+    (json.dumps(dict(SNAPSHOT, data_quality={"columns": {}, "gender_variants": {}})),
+     "No data-quality issues found"),
+])
+def test_data_quality_tab_messages(tmp_path, monkeypatch, content, expected):
+    at = run_dashboard(tmp_path, monkeypatch, content)
+    assert any(expected in m for m in messages(at))
+
+
+def test_kpis_and_gender_note_come_from_the_same_snapshot(tmp_path, monkeypatch):
+    at = run_dashboard(tmp_path, monkeypatch, json.dumps(SNAPSHOT))
+    metrics = {m.label: m.value for m in at.metric}
+    assert metrics["Rows"] == "3"
+    assert metrics["Missing Gender"] == "1"
+    assert any("missing in **1** rows" in m and "`male` (1)" in m for m in messages(at))
@@ -0,0 +1,97 @@
+"""
+Load test: N simulated viewer sessions of the dashboard share one set of frames/figures.
+
+What the shared cache saves is build time: only the first session builds frames and
+figures. It does not make per-session memory smaller; each session still holds its own
+rendered chart payloads (Streamlit serialises every plotly_chart per session), and the
+peak allocation of a session run is about the same with or without the cache.
+
+Run `python tests/test_dashboard_sessions.py [N]` for per-session time/memory numbers.
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+DASHBOARD = str(Path(__file__).resolve().parent.parent / "dashboard_ohealth_stats.py")
+
+
+def run_sessions(n):
+    """Run n independent sessions; returns the AppTests (kept alive, like open browser tabs)."""
+    sessions = []
+    for _ in range(n):
+        at = AppTest.from_file(DASHBOARD, default_timeout=30).run()
+        assert not at.exception
+        sessions.append(at)
+    return sessions
+
+
+def profile_runs(n, shared=True):
+    """
+    Mean wall time and mean peak allocation of one session's script run over n sessions.
+    The peak is what each concurrently rerunning session adds while it builds its frames
+    and figures; with the shared cache only the first session pays for the build.
+    """
+    st.cache_resource.clear()
+    times, peaks = [], []
+    for _ in range(n):
+        if not shared:
+            st.cache_resource.clear()
+        gc.collect()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        at = AppTest.from_file(DASHBOARD, default_timeout=30).run()
+        times.append(time.perf_counter() - t0)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert not at.exception
+        del at
+    # skip the first (cold) session; it builds the cache in both modes
+    return sum(times[1:]) / (n - 1), sum(peaks[1:]) / (n - 1)
+
+
+@pytest.fixture
+def count_figures(monkeypatch):
+    # every shared figure builder finishes through report_figures._layout
+    import report_figures as rf
+
+    calls = []
+    real = rf._layout
+    monkeypatch.setattr(rf, "_layout", lambda *a, **k: calls.append(1) or real(*a, **k))
+    return calls
+
+
+def test_figures_built_once_across_sessions(count_figures):
+    st.cache_resource.clear()
+    run_sessions(1)
+    built_by_first = len(count_figures)
+    assert built_by_first > 0
+
+    run_sessions(7)
+    assert len(count_figures) == built_by_first
+
+
+def test_new_snapshot_invalidates(count_figures):
+    st.cache_resource.clear()
+    run_sessions(2)
+    built = len(count_figures)
+
+    # pasting in a new stats snapshot changes the version, so figures are rebuilt
+    source = Path(DASHBOARD).read_text(encoding="utf-8")
+    at = AppTest.from_string(source.replace("total_rows = 504", "total_rows = 505"), default_timeout=30).run()
+    assert not at.exception
+    assert len(count_figures) == 2 * built
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for shared in (True, False):
+        label = "shared cache" if shared else "per-session rebuild"
+        secs, peak = profile_runs(n, shared)
+        print(f"{label:>20}: {secs * 1000:.0f} ms, {peak / 1024:.0f} KiB peak per session run (N={n})")
+
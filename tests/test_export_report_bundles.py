@@ -0,0 +1,70 @@
+import json
+
+import pandas as pd
+
+import export_report_bundles as export
+import report_figures as rf
+
+SNAPSHOT = {
+    "hospital": "Balrampur",
+    "window": "jan16_feb2",
+    "total_rows": 3,
+    "symptoms_freq": {"fever": 2, "cough": 1},
+    "initial_symptoms_freq": {"fever": 2},
+    "specialists_freq": {"General Medicine": 3},
+    "age_buckets": {"0-12": 1, "18-29": 2},
+    "gender_freq": {"F": 2, "(missing)": 1},
+    "symptom_duration_map": {"fever": {"2 days": 2}, "cough": {"1 week": 1}},
+    "data_quality": {"columns": {"gender": {"null": 1}}, "gender_variants": {}},
+}
+
+
+def write_snapshot(tmp_path, snap=SNAPSHOT):
+    path = tmp_path / "Balrampur_jan16_feb2.json"
+    path.write_text(json.dumps(snap, sort_keys=True), encoding="utf-8")
+    return path
+
+
+def test_export_then_skip_unchanged(tmp_path):
+    path = write_snapshot(tmp_path)
+    out = tmp_path / "bundles"
+    assert export.export_bundle(path, out) == ("Balrampur_jan16_feb2", "exported")
+    bundle = out / "Balrampur_jan16_feb2"
+    html = (bundle / "index.html").read_text(encoding="utf-8")
+    for section in ("Symptoms", "Specialist Load", "Demographics", "Duration Explorer", "Data Quality"):
+        assert f"<h2>{section}</h2>" in html
+    # self-contained: the folder draws its charts when shared on its own
+    assert "<script src='plotly.min.js'>" in html
+    assert "plotly.min.js" in json.loads((bundle / "manifest.json").read_text(encoding="utf-8"))["files"]
+    assert export.export_bundle(path, out)[1] == "unchanged"
+
+
+def test_missing_file_or_new_snapshot_reexports(tmp_path):
+    path = write_snapshot(tmp_path)
+    out = tmp_path / "bundles"
+    export.export_bundle(path, out)
+
+    for name in ("index.html", "plotly.min.js"):
+        (out / "Balrampur_jan16_feb2" / name).unlink()
+        assert export.export_bundle(path, out)[1] == "exported"
+
+    write_snapshot(tmp_path, dict(SNAPSHOT, total_rows=4))
+    assert export.export_bundle(path, out)[1] == "exported"
+
+
+def test_duration_charts_capped_but_extract_complete(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "DURATION_TOP_N", 1)
+    out = tmp_path / "bundles"
+    export.export_bundle(write_snapshot(tmp_path), out)
+    html = (out / "Balrampur_jan16_feb2" / "index.html").read_text(encoding="utf-8")
+    assert '"name":"fever"' in html and '"name":"cough"' not in html
+    extract = next((out / "Balrampur_jan16_feb2").glob("durations.*"))
+    df = pd.read_parquet(extract) if extract.suffix == ".parquet" else pd.read_csv(extract)
+    assert sorted(df["symptom"]) == ["cough", "fever"]
+
+
+def test_durations_extract_is_long_table():
+    frames = rf.build_frames(SNAPSHOT)
+    df = rf.durations_long(frames["durations"])
+    assert list(df.columns) == ["symptom", "duration", "count"]
+    assert df.values.tolist() == [["cough", "1 week", 1], ["fever", "2 days", 2]]
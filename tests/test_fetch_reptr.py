@@ -0,0 +1,212 @@
+import csv
+import json
+import runpy
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import fetch_reptr
+
+
+def test_parse_ids_merges_ranges_and_singles():
+    assert fetch_reptr.parse_ids("5-10, 1 3 8-12 20–18 2") == [(1, 3), (5, 12), (18, 20)]
+
+
+def test_parse_ids_plans_millions_without_expanding():
+    ranges = fetch_reptr.parse_ids("1-5000000 7000000-9000000")
+    assert fetch_reptr.count_ids(ranges) == 7_000_001
+    shards = fetch_reptr.shard_ranges(ranges, 8)
+    assert sum(fetch_reptr.count_ids(s) for s in shards) == 7_000_001
+
+
+def test_subtract_and_shard_cover_every_id_once():
+    ranges = fetch_reptr.parse_ids("1-3 5-12 18-20")
+    pending = fetch_reptr.subtract_ids(ranges, [1, 5, 6, 12, 19, 100])
+    assert list(fetch_reptr.iter_ids(pending)) == [2, 3, 7, 8, 9, 10, 11, 18, 20]
+    for n in range(1, 6):
+        shards = fetch_reptr.shard_ranges(pending, n)
+        assert [i for s in shards for i in fetch_reptr.iter_ids(s)] == list(fetch_reptr.iter_ids(pending))
+
+
+@pytest.fixture
+def fake_fetch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(fetch_reptr, "REPORT_IDS", fetch_reptr.parse_ids("1-10"))
+    monkeypatch.setattr(fetch_reptr, "SLEEP_BETWEEN", 0)
+    monkeypatch.setitem(fetch_reptr._state, "sleep", 0)
+    requested = []
+    # the body carries an unrelated "id"; resume must not trust it
+    monkeypatch.setattr(fetch_reptr, "fetch_report", lambda i: requested.append(i) or {"id": 999, "hospital_id": 6})
+    return requested
+
+
+def saved_ids(path):
+    return [rid for rid, _ in fetch_reptr.read_saved_rows(path)]
+
+
+def test_resume_uses_recorded_ids(fake_fetch):
+    fetch_reptr.main([])
+    fetch_reptr.main([])
+    assert fake_fetch == list(range(1, 11))
+    assert saved_ids(fetch_reptr.OUTPUT_CSV) == list(range(1, 11))
+
+
+def test_legacy_file_is_migrated_before_resume(fake_fetch, capsys):
+    legacy = [
+        json.dumps({"assessment_id": 2, "hospital_id": 6}),
+        json.dumps({"id": 3, "hospital_id": 6}),  # no assessment_id: cannot be attributed
+    ]
+    with open(fetch_reptr.OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows([["report_json"]] + [[r] for r in legacy])
+    fetch_reptr.main([])
+
+    assert fake_fetch == [1] + list(range(3, 11))
+    assert sorted(saved_ids(fetch_reptr.OUTPUT_CSV)) == list(range(1, 11))
+    assert "moved to" in capsys.readouterr().out
+    side = Path(fetch_reptr.OUTPUT_CSV).with_name(f"{Path(fetch_reptr.OUTPUT_CSV).stem}.unidentified.csv")
+    assert list(csv.reader(open(side, encoding="utf-8")))[1:] == [[legacy[1]]]
+
+    # downstream still parses the resumed file, once per report
+    raw = pd.read_csv(fetch_reptr.OUTPUT_CSV, header=None, dtype=str)
+    assert len(raw) == 11
+    runpy.run_path(str(Path(fetch_reptr.__file__).with_name("segregate_field_reptr.py")))
+    assert len(pd.read_csv("rpt_field_v2_Balrampur_jan16_feb2.csv")) == 10
+
+
+def test_shards_then_merge(fake_fetch):
+    for k in range(3):
+        fetch_reptr.main(["--shard", f"{k}/3"])
+    assert sorted(fake_fetch) == list(range(1, 11))
+
+    fetch_reptr.main(["--merge"])
+    fetch_reptr.main(["--merge"])  # idempotent
+    assert sorted(saved_ids(fetch_reptr.OUTPUT_CSV)) == list(range(1, 11))
+
+
+def test_bad_shard_arg():
+    with pytest.raises(SystemExit):
+        fetch_reptr.parse_args(["--shard", "3/3"])
+
+
+# ---------------- fault-injecting stub server ----------------
+class StubServer:
+    """
+    Local HTTP server for getCompleteReport. `faults` is a list of statuses (or "html" for a
+    200 HTML page, "badgzip" for an undecodable gzip body) returned before answering
+    normally; only `accept_key` is a valid payload key (others get 400).
+    """
+
+    def __init__(self, accept_key="assessment_id"):
+        self.faults = []
+        self.retry_after = None
+        self.accept_key = accept_key
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests.append(body)
+                fault = stub.faults.pop(0) if stub.faults else None
+                if fault in ("html", "badgzip"):
+                    self.send_response(200)
+                    if fault == "badgzip":
+                        self.send_header("Content-Encoding", "gzip")
+                    body = b"<html></html>"
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if fault:
+                    self.send_response(fault)
+                    if stub.retry_after is not None:
+                        self.send_header("Retry-After", stub.retry_after)
+                    self.end_headers()
+                    return
+                if stub.accept_key not in body:
+                    self.send_response(400)
+                    self.end_headers()
+                    self.wfile.write(b"unknown payload key")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(json.dumps({"report": body[stub.accept_key]}).encode())
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = StubServer()
+    sleeps = []
+    monkeypatch.setattr(fetch_reptr, "URL", server.url)
+    monkeypatch.setattr(fetch_reptr.time, "sleep", sleeps.append)
+    monkeypatch.setattr(fetch_reptr, "_state", {"payload_key": "assessment_id", "sleep": 0.25, "failures": 0})
+    server.sleeps = sleeps
+    yield server
+    server.server.shutdown()
+
+
+def test_retries_5xx_then_succeeds_without_fallback(stub):
+    stub.faults = [503, 502]
+    assert fetch_reptr.fetch_report(7) == {"report": 7}
+    assert stub.requests == [{"assessment_id": 7}] * 3
+    assert len(stub.sleeps) == 2 and all(s <= fetch_reptr.BACKOFF_MAX for s in stub.sleeps)
+    assert fetch_reptr._state["failures"] == 0
+
+
+def test_honours_retry_after_beyond_backoff_cap(stub):
+    stub.faults, stub.retry_after = [429], "120"
+    assert fetch_reptr.fetch_report(1) == {"report": 1}
+    assert stub.sleeps == [120.0]
+
+
+def test_remembers_working_payload_key(stub):
+    stub.accept_key = "reportId"
+    assert fetch_reptr.fetch_report(1) == {"report": 1}
+    assert fetch_reptr.fetch_report(2) == {"report": 2}
+    assert stub.requests == [{"assessment_id": 1}, {"reportId": 1}, {"reportId": 2}]
+
+
+def test_breaker_pauses_on_sustained_5xx_and_recovers(stub):
+    stub.faults = [500] * (fetch_reptr.RETRIES + 2)
+    assert fetch_reptr.fetch_report(1) is None
+    assert fetch_reptr.BREAKER_COOLDOWN not in stub.sleeps
+    # no fallback key was tried for server errors
+    assert all("assessment_id" in r for r in stub.requests)
+
+    assert fetch_reptr.fetch_report(2) == {"report": 2}
+    assert fetch_reptr.BREAKER_COOLDOWN in stub.sleeps
+    assert fetch_reptr._state["failures"] == 0
+    # pacing backed off under trouble and decays on success
+    assert fetch_reptr.SLEEP_BETWEEN < fetch_reptr._state["sleep"] <= fetch_reptr.SLEEP_MAX
+
+
+def test_non_json_body_skips_id_without_fallback(stub):
+    stub.faults = ["html"]
+    assert fetch_reptr.fetch_report(1) is None
+    assert stub.requests == [{"assessment_id": 1}]
+    assert fetch_reptr._state["payload_key"] == "assessment_id"
+
+
+def test_undecodable_body_skips_id_only(stub):
+    stub.faults = ["badgzip"]
+    assert fetch_reptr.fetch_report(1) is None
+    assert fetch_reptr.fetch_report(2) == {"report": 2}
+    assert stub.sleeps == [] and fetch_reptr._state["failures"] == 0
+
+
+def test_config_error_is_not_retried(stub, monkeypatch):
+    monkeypatch.setattr(fetch_reptr, "URL", "not-a-url")
+    with pytest.raises(fetch_reptr.requests.exceptions.MissingSchema):
+        fetch_reptr.fetch_report(1)
+    assert stub.sleeps == [] and fetch_reptr._state["failures"] == 0
@@ -0,0 +1,35 @@
+import csv
+import json
+
+import stats_hospital
+
+HEADER = ["raw_json", "lifestyle_factors", "age", "gender", "symptoms", "symptom_duration",
+          "initial_symptom", "suggested_specialist"]
+
+
+def run_stats(tmp_path, monkeypatch, rows):
+    monkeypatch.chdir(tmp_path)
+    with open("input.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    monkeypatch.setattr(stats_hospital, "INPUT_CSV", "input.csv")
+    monkeypatch.setattr(stats_hospital, "SNAPSHOT_JSON", "snapshots/test.json")
+    stats_hospital.main()
+    with open("snapshots/test.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_data_quality_issue_classes_are_exclusive(tmp_path, monkeypatch):
+    snap = run_stats(tmp_path, monkeypatch, [
+        ["{}", "", "34", "M", '["fever"]', '{"fever": "2 days"}', '["fever"]', "ENT"],
+        ["{}", "", "abc", "male", '["cough"]', "2 days", "", ""],
+        ["{}", "", "", "", '["cold"]', '["2 days"]', "[]", "ENT"],
+    ])
+    columns = snap["data_quality"]["columns"]
+    assert columns["initial_symptom"] == {"null": 1, "empty": 1}
+    assert columns["symptom_duration"] == {"unparseable_json": 1, "not_dict": 1}
+    assert columns["age"] == {"unparsed": 1, "null": 1}
+    assert columns["gender"] == {"non_canonical": 1, "null": 1}
+    assert snap["data_quality"]["gender_variants"] == {"male": 1}
+    assert not list(tmp_path.glob("snapshots/*.tmp"))